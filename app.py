@@ -1,8 +1,25 @@
 from __future__ import annotations
 
-from urllib.parse import urlparse
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import pandas as pd
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import (
+    backend_endpoints,
+    backend_url_sane,
+    canonicalize_metrics,
+    derive_api_candidates,
+    json_loads,
+    metric_int,
+    norm_url,
+    pick_list,
+    tenant_lock_error,
+)
 
 
 # ----------------------------
@@ -18,115 +35,172 @@ st.set_page_config(
 # ----------------------------
 # Helpers
 # ----------------------------
-def norm_url(u: str) -> str:
-    u = (u or "").strip()
-    if not u:
-        return ""
-    if "://" not in u:
-        u = "https://" + u
-    return u.rstrip("/")
+@st.cache_resource(show_spinner=False)
+def get_http_session() -> requests.Session:
+    """
+    One pooled Session per server process so repeated backend calls reuse
+    keep-alive connections instead of paying a TCP+TLS handshake each time.
+    """
+    s = requests.Session()
+    # Retry transient backend blips (Render cold starts often 502/503).
+    # POST is included deliberately: /run overwrites the latest snapshot,
+    # so retrying it is effectively idempotent.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Small worker pool so independent backend calls (health probe + latest
+    snapshot) can overlap instead of running back-to-back.
+    """
+    return ThreadPoolExecutor(max_workers=2)
 
 
-def host_of(u: str) -> str:
-    u = norm_url(u)
-    if not u:
-        return ""
-    return (urlparse(u).netloc or "").strip()
+def safe_get(url: str, timeout: int | tuple[float, float] = 25) -> dict:
+    r = get_http_session().get(url, timeout=timeout)
+    r.raise_for_status()
+    return json_loads(r.content)
 
 
-def backend_url_sane(u: str) -> tuple[bool, str]:
+@st.cache_data(ttl=30, show_spinner=False)
+def check_backend_health(backend_url: str) -> tuple[str, str]:
     """
-    Catch common mistakes like: https://sf-ec-gates-backend. (trailing dot / missing domain)
+    Probe GET /health, cached briefly so every sidebar rerun doesn't
+    re-ping the backend. Returns (status, detail) with status one of
+    "ok", "unexpected", "error".
     """
-    if not u:
-        return False, "Backend URL is required."
-    h = host_of(u)
-    if not h:
-        return False, "Backend URL is invalid (missing host)."
-    if h.endswith("."):
-        return False, "Backend URL host ends with a dot. Remove the trailing '.'"
-    if "." not in h:
-        return False, "Backend URL host looks incomplete (no dot found)."
-    return True, ""
-
-
-def derive_api_candidates(instance_url: str) -> list[str]:
+    try:
+        health_url, _, _ = backend_endpoints(backend_url)
+        j = safe_get(health_url, timeout=HEALTH_TIMEOUT)
+        if j.get("ok") is True:
+            return "ok", ""
+        return "unexpected", ""
+    except Exception as e:
+        return "error", str(e)
+
+
+@st.cache_resource(show_spinner=False)
+def get_etag_store() -> dict:
+    """Last seen (ETag, payload) per tenant, for conditional GETs."""
+    return {}
+
+
+def fetch_latest(backend_url: str, instance_url: str, company_id: str, etag_store: dict | None = None) -> dict:
+    params = {"instance_url": instance_url}
+    if company_id:
+        params["company_id"] = company_id
+
+    # Opportunistic conditional GET: if the backend emits ETags, a 304
+    # skips re-transferring and re-parsing an unchanged snapshot. If it
+    # doesn't, this is a plain GET.
+    key = (backend_url, instance_url, company_id)
+    headers = None
+    if etag_store and key in etag_store:
+        headers = {"If-None-Match": etag_store[key][0]}
+
+    _, latest_url, _ = backend_endpoints(backend_url)
+    r = get_http_session().get(
+        latest_url, params=params, headers=headers, timeout=LATEST_TIMEOUT
+    )
+    if r.status_code == 304 and etag_store is not None:
+        return etag_store[key][1]
+    r.raise_for_status()
+    payload = json_loads(r.content)
+
+    etag = r.headers.get("ETag")
+    if etag and etag_store is not None:
+        etag_store[key] = (etag, payload)
+    return payload
+
+
+@st.cache_data(ttl=3600, persist="disk", show_spinner=False)
+def fetch_latest_cached(backend_url: str, instance_url: str, company_id: str) -> dict:
     """
-    Provide candidate API bases from instance URL.
-    IMPORTANT: We do NOT auto-select/use these.
+    Cache so unrelated widget interactions (which rerun the whole script)
+    don't re-hit /metrics/latest for the same tenant. Persisted to disk so
+    snapshots survive process restarts; the stored snapshot only changes
+    via Run/Refresh, both of which clear this cache explicitly.
     """
-    host = host_of(instance_url)
-    if not host:
-        return []
+    return fetch_latest(backend_url, instance_url, company_id, get_etag_store())
 
-    out: list[str] = []
 
-    # hcmXX.sapsf.com -> apiXX.sapsf.com (also supports hcm41preview.sapsf.com -> api41preview.sapsf.com)
-    if host.startswith("hcm") and host.endswith(".sapsf.com"):
-        out.append("https://" + ("api" + host[3:]))
+def apply_latest(payload: dict) -> None:
+    metrics = payload.get("metrics")
+    if isinstance(metrics, dict):
+        canonicalize_metrics(metrics)
+    st.session_state.last_status = payload.get("status", "empty")
+    st.session_state.last_metrics = metrics
+    st.session_state.last_error = ""
 
-    # Generic: prefix api to host if not already
-    if not host.startswith("api"):
-        out.append("https://" + ("api" + host))
 
-    # If user already pasted api host as "instance", just include it
-    if host.startswith("api"):
-        out.append("https://" + host)
+SAMPLE_MAX_ROWS = 200
 
-    # de-dupe keep order
-    uniq = []
-    for x in out:
-        x = norm_url(x)
-        if x and x not in uniq:
-            k = x
-            uniq.append(k)
-    return uniq
+# (connect, read) pairs: cap connect latency tightly while allowing the
+# long-running /run POST its full read window.
+HEALTH_TIMEOUT = (5, 10)
+LATEST_TIMEOUT = (5, 30)
+RUN_TIMEOUT = (5, 180)
 
+TAB_LABELS = ("📧 Email hygiene", "🧩 Org checks", "👤 Manager checks", "👥 Workforce", "🔎 Raw JSON")
 
-def safe_get(url: str, timeout: int = 25) -> dict:
-    r = requests.get(url, timeout=timeout)
-    r.raise_for_status()
-    return r.json()
+TENANT_KEYS = (
+    "backend_url",
+    "instance_url",
+    "api_choice",
+    "api_override",
+    "sf_username",
+    "sf_password",
+    "company_id",
+)
+
+STATE_DEFAULTS = {
+    "tenant_locked": False,
+    "last_metrics": None,
+    "last_status": "empty",
+    "last_error": "",
+    "auto_load_attempted": False,
+}
 
 
 def reset_tenant():
-    keys = [
-        "tenant_locked",
-        "backend_url",
-        "instance_url",
-        "api_choice",
-        "api_override",
-        "sf_username",
-        "sf_password",
-        "company_id",
-        "last_metrics",
-        "last_status",
-        "last_error",
-    ]
-    for k in keys:
-        if k in st.session_state:
-            del st.session_state[k]
-
-
-def metric_int(metrics: dict, *keys: str) -> int:
+    for k in TENANT_KEYS:
+        st.session_state.pop(k, None)
+    st.session_state.pop("run_future", None)
+    st.session_state.update(STATE_DEFAULTS)
+
+
+@st.cache_data(show_spinner=False)
+def pretty_json(payload_json: str) -> str:
     """
-    Return first present metric as int.
+    Pretty-print once per distinct payload; reruns reuse the cached string
+    instead of re-serializing the whole metrics dict.
     """
-    for k in keys:
-        if k in metrics:
-            try:
-                return int(metrics.get(k) or 0)
-            except Exception:
-                return 0
-    return 0
+    return json.dumps(json.loads(payload_json), indent=2, default=str)
 
 
-def pick_list(metrics: dict, *keys: str) -> list[dict]:
-    for k in keys:
-        v = metrics.get(k)
-        if isinstance(v, list):
-            return v
-    return []
+@st.cache_data(show_spinner=False)
+def sample_df(rows_json: str) -> pd.DataFrame:
+    """
+    Build the DataFrame once per distinct sample payload; reruns with the
+    same rows skip pandas construction and Arrow conversion entirely.
+    Arrow-backed dtypes keep st.dataframe from re-converting to Arrow.
+    """
+    df = pd.DataFrame.from_records(json.loads(rows_json))
+    try:
+        return df.convert_dtypes(dtype_backend="pyarrow")
+    except (ImportError, TypeError):
+        return df
 
 
 def show_table(rows: list[dict], title: str):
@@ -134,16 +208,23 @@ def show_table(rows: list[dict], title: str):
     if not rows:
         st.info("No sample data available.")
         return
-    st.dataframe(rows, use_container_width=True, hide_index=True)
+    total = len(rows)
+    # Slice before building the DataFrame so oversized samples never pay
+    # construction/serialization cost for rows we won't display.
+    rows = rows[:SAMPLE_MAX_ROWS]
+    # Key order in the parsed payload is deterministic, so the cache key
+    # is stable without sort_keys — which would alphabetize the columns.
+    df = sample_df(json.dumps(rows, default=str))
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    if total > SAMPLE_MAX_ROWS:
+        st.caption(f"Showing first {SAMPLE_MAX_ROWS} of {total} rows.")
 
 
 # ----------------------------
 # Session init
 # ----------------------------
-st.session_state.setdefault("tenant_locked", False)
-st.session_state.setdefault("last_metrics", None)
-st.session_state.setdefault("last_status", "empty")
-st.session_state.setdefault("last_error", "")
+if "_state_init" not in st.session_state:
+    st.session_state.update({**STATE_DEFAULTS, "_state_init": True})
 
 
 # ----------------------------
@@ -151,35 +232,55 @@ st.session_state.setdefault("last_error", "")
 # ----------------------------
 st.sidebar.markdown("## Connection")
 
+# Widgets are key-bound: Streamlit persists the raw input itself, so no
+# manual session_state writes (and their widget-diff churn) per rerun.
 backend_in = st.sidebar.text_input(
     "Backend URL",
-    value=st.session_state.get("backend_url", ""),
+    key="backend_url",
     placeholder="https://sf-ec-gates-backend.onrender.com",
     disabled=st.session_state.tenant_locked,
 )
 backend_url = norm_url(backend_in)
-st.session_state.backend_url = backend_url
 
 sane, sane_msg = backend_url_sane(backend_url)
 backend_ok = False
 backend_err = ""
 
+# Kick off the snapshot fetch before the health probe below so the two
+# round-trips overlap (instance/company come from the previous rerun).
+prefetch_latest: Future | None = None
+if (
+    sane
+    and st.session_state.tenant_locked
+    and st.session_state.last_metrics is None
+    and st.session_state.last_status == "empty"
+    and not st.session_state.auto_load_attempted
+    and st.session_state.get("instance_url")
+):
+    prefetch_latest = get_executor().submit(
+        fetch_latest,
+        backend_url,
+        norm_url(st.session_state.instance_url),
+        (st.session_state.get("company_id") or "").strip(),
+        get_etag_store(),
+    )
+
 if backend_url:
     if not sane:
         backend_ok = False
         backend_err = sane_msg
         st.sidebar.error(backend_err)
     else:
-        try:
-            j = safe_get(f"{backend_url}/health", timeout=10)
-            backend_ok = bool(j.get("ok") is True)
-            if backend_ok:
-                st.sidebar.success("Backend reachable ✅")
-            else:
-                st.sidebar.warning("Backend reachable, but health response is unexpected.")
-        except Exception as e:
-            backend_ok = False
-            backend_err = str(e)
+        if st.sidebar.button("Recheck backend"):
+            # Bypass the 30s TTL when the user wants a fresh probe now.
+            check_backend_health.clear()
+        health_status, backend_err = check_backend_health(backend_url)
+        backend_ok = health_status == "ok"
+        if backend_ok:
+            st.sidebar.success("Backend reachable ✅")
+        elif health_status == "unexpected":
+            st.sidebar.warning("Backend reachable, but health response is unexpected.")
+        else:
             st.sidebar.error(f"Backend not reachable: {backend_err}")
 else:
     st.sidebar.info("Enter Backend URL to enable checks.")
@@ -189,14 +290,13 @@ st.sidebar.markdown("## Instance")
 
 instance_in = st.sidebar.text_input(
     "Instance URL",
-    value=st.session_state.get("instance_url", ""),
+    key="instance_url",
     placeholder="https://hcm41.sapsf.com or https://salesdemo.successfactors.eu",
     disabled=st.session_state.tenant_locked,
 )
 instance_url = norm_url(instance_in)
-st.session_state.instance_url = instance_url
 
-candidates = derive_api_candidates(instance_url)
+candidates = list(derive_api_candidates(instance_url))
 st.sidebar.caption("Derived API base candidates (informational — not auto-used):")
 if candidates:
     for c in candidates:
@@ -209,19 +309,18 @@ api_choice = st.sidebar.selectbox(
     "Select API base URL (required)",
     options=[""] + candidates,
     index=0,
+    key="api_choice",
     disabled=st.session_state.tenant_locked,
     help="Pick a candidate or use override. (We do not auto-default to prevent wrong-tenant calls.)",
 )
-st.session_state.api_choice = api_choice
 
 api_override_in = st.sidebar.text_input(
     "API base override (optional)",
-    value=st.session_state.get("api_override", ""),
+    key="api_override",
     placeholder="https://apisalesdemo2.successfactors.eu",
     disabled=st.session_state.tenant_locked,
 )
 api_override = norm_url(api_override_in)
-st.session_state.api_override = api_override
 
 effective_api_base = api_override or api_choice
 
@@ -234,50 +333,46 @@ else:
 st.sidebar.markdown("---")
 st.sidebar.markdown("## Credentials (per tenant)")
 
-sf_username = st.sidebar.text_input(
-    "SF Username",
-    value=st.session_state.get("sf_username", ""),
-    disabled=st.session_state.tenant_locked,
-)
-sf_password = st.sidebar.text_input(
-    "SF Password",
-    value=st.session_state.get("sf_password", ""),
-    type="password",
-    disabled=st.session_state.tenant_locked,
-)
-company_id = st.sidebar.text_input(
-    "Company ID (optional)",
-    value=st.session_state.get("company_id", ""),
-    disabled=st.session_state.tenant_locked,
-)
-
-st.session_state.sf_username = sf_username
-st.session_state.sf_password = sf_password
-st.session_state.company_id = company_id.strip()
+# Credentials are batched in a form: typing in these fields does not
+# trigger a rerun (and the /health probe above) per field — only the
+# submit does.
+with st.sidebar.form("credentials"):
+    sf_username = st.text_input(
+        "SF Username",
+        key="sf_username",
+        disabled=st.session_state.tenant_locked,
+    )
+    sf_password = st.text_input(
+        "SF Password",
+        key="sf_password",
+        type="password",
+        disabled=st.session_state.tenant_locked,
+    )
+    company_id = st.text_input(
+        "Company ID (optional)",
+        key="company_id",
+        disabled=st.session_state.tenant_locked,
+    )
+    lock_tenant = st.form_submit_button(
+        "Use this tenant",
+        disabled=st.session_state.tenant_locked,
+    )
 
 st.sidebar.markdown("---")
-c1, c2 = st.sidebar.columns(2)
-
-with c1:
-    if st.button("Use this tenant", disabled=st.session_state.tenant_locked):
-        if not backend_url:
-            st.sidebar.error("Backend URL is required.")
-        elif not backend_ok:
-            st.sidebar.error("Backend must be reachable.")
-        elif not instance_url:
-            st.sidebar.error("Instance URL is required.")
-        elif not effective_api_base:
-            st.sidebar.error("Select API base URL (or override).")
-        elif not sf_username or not sf_password:
-            st.sidebar.error("Username + Password are required.")
-        else:
-            st.session_state.tenant_locked = True
-            st.sidebar.success("Tenant locked ✅")
 
-with c2:
-    if st.button("Logout / Reset", disabled=not st.session_state.tenant_locked):
-        reset_tenant()
-        st.rerun()
+if lock_tenant:
+    lock_err = tenant_lock_error(
+        backend_url, backend_ok, instance_url, effective_api_base, sf_username, sf_password
+    )
+    if lock_err:
+        st.sidebar.error(lock_err)
+    else:
+        st.session_state.tenant_locked = True
+        st.sidebar.success("Tenant locked ✅")
+
+if st.sidebar.button("Logout / Reset", disabled=not st.session_state.tenant_locked):
+    reset_tenant()
+    st.rerun()
 
 
 # ----------------------------
@@ -297,72 +392,116 @@ if not st.session_state.tenant_locked:
 # ----------------------------
 # Actions
 # ----------------------------
-a, b, c = st.columns([1.2, 1.2, 2.6])
+a, b, c, d = st.columns([1.2, 1.2, 1.0, 2.2])
+run_in_flight = st.session_state.get("run_future") is not None
 with a:
-    run_now = st.button("🔄 Run live check now", use_container_width=True)
+    run_now = st.button("🔄 Run live check now", use_container_width=True, disabled=run_in_flight)
 with b:
     refresh_now = st.button("🧾 Refresh latest snapshot", use_container_width=True)
 with c:
+    auto_refresh = st.toggle("Auto-refresh", value=False)
+    refresh_seconds = int(
+        st.number_input(
+            "Every (seconds)",
+            min_value=10,
+            max_value=300,
+            value=30,
+            step=10,
+            disabled=not auto_refresh,
+        )
+    )
+with d:
     st.info("Tip: **Run** pulls live SF data via backend; **Refresh** loads the latest stored snapshot for this instance/company.")
 
 
 def load_latest():
-    params = {"instance_url": instance_url}
-    if company_id.strip():
-        params["company_id"] = company_id.strip()
-
-    r = requests.get(f"{backend_url}/metrics/latest", params=params, timeout=30)
-    r.raise_for_status()
-    payload = r.json()
+    apply_latest(fetch_latest_cached(backend_url, instance_url, company_id.strip()))
 
-    st.session_state.last_status = payload.get("status", "empty")
-    st.session_state.last_metrics = payload.get("metrics")
-    st.session_state.last_error = ""
 
-
-def run_live():
-    payload = {
-        "instance_url": instance_url,
-        "api_base_url": effective_api_base,
-        "username": sf_username,
-        "password": sf_password,
-        "company_id": company_id.strip() or None,
-        "timeout": 60,
-        "verify_ssl": True,
-    }
-    r = requests.post(f"{backend_url}/run", json=payload, timeout=180)
+def post_run(run_url: str, payload: dict) -> dict:
+    """
+    POST /run and return the response body. Runs in a worker thread, so
+    it is pure HTTP — session_state and caches are main-thread only.
+    """
+    r = get_http_session().post(run_url, json=payload, timeout=RUN_TIMEOUT)
 
     if r.status_code >= 400:
         try:
-            detail = r.json().get("detail", r.text)
+            detail = json_loads(r.content).get("detail", r.text)
         except Exception:
             detail = r.text
         raise RuntimeError(f"{r.status_code}: {detail}")
 
-    data = r.json()
-    st.session_state.last_metrics = data.get("metrics")
-    st.session_state.last_status = "ok"
-    st.session_state.last_error = ""
+    return json_loads(r.content)
 
 
-if refresh_now:
+def run_status():
+    fut: Future | None = st.session_state.get("run_future")
+    if fut is None:
+        return
+    if not fut.done():
+        st.status("Live check running in the background…", state="running")
+        return
+    st.session_state.run_future = None
     try:
-        load_latest()
+        data = fut.result()
     except Exception as e:
         st.session_state.last_error = str(e)
-        st.error(f"Refresh failed: {st.session_state.last_error}")
+    else:
+        metrics = data.get("metrics")
+        if isinstance(metrics, dict):
+            canonicalize_metrics(metrics)
+        st.session_state.last_metrics = metrics
+        st.session_state.last_status = "ok"
+        st.session_state.last_error = ""
+        fetch_latest_cached.clear()
+    st.rerun(scope="app")
+
 
-if run_now:
+if refresh_now:
     try:
-        run_live()
+        # Explicit refresh should bypass the TTL cache.
+        fetch_latest_cached.clear()
+        load_latest()
     except Exception as e:
         st.session_state.last_error = str(e)
-        st.error(f"Run failed: {st.session_state.last_error}")
+        st.error(f"Refresh failed: {st.session_state.last_error}")
 
-# Auto-load once
-if st.session_state.last_metrics is None and st.session_state.last_status == "empty":
+if run_now and not run_in_flight:
+    # Hand the long-running POST to the worker pool; the script returns
+    # immediately and the polling fragment below picks up the result.
+    st.session_state.run_future = get_executor().submit(
+        post_run,
+        backend_endpoints(backend_url)[2],
+        {
+            "instance_url": instance_url,
+            "api_base_url": effective_api_base,
+            "username": sf_username,
+            "password": sf_password,
+            "company_id": company_id.strip() or None,
+            "timeout": 60,
+            "verify_ssl": True,
+        },
+    )
+    run_in_flight = True
+
+# While a run is in flight, only this fragment re-executes every couple
+# of seconds to poll the future; the rest of the page stays interactive.
+st.fragment(run_every="2s" if run_in_flight else None)(run_status)()
+
+# Auto-load once per tenant lock — the sentinel keeps a failing backend
+# from re-triggering a full-timeout fetch on every subsequent rerun.
+if (
+    st.session_state.last_metrics is None
+    and st.session_state.last_status == "empty"
+    and not st.session_state.auto_load_attempted
+):
+    st.session_state.auto_load_attempted = True
     try:
-        load_latest()
+        if prefetch_latest is not None:
+            apply_latest(prefetch_latest.result())
+        else:
+            load_latest()
     except Exception:
         pass
 
@@ -370,84 +509,133 @@ if st.session_state.last_metrics is None and st.session_state.last_status == "em
 # ----------------------------
 # Render
 # ----------------------------
-metrics = st.session_state.last_metrics
-status = st.session_state.last_status
+# KPI Strip — match your gates.py keys
+# Canonical keys only — alias resolution happens once in apply_latest.
+KPIS = (
+    ("Active users", "active_users"),
+    ("EmpJob rows", "empjob_rows"),
+    ("Contingent", "contingent_workers"),
+    ("Inactive users", "inactive_users"),
+    ("Missing managers", "missing_manager_count"),
+    ("Invalid org", "invalid_org_count"),
+    ("Missing emails", "missing_email_count"),
+    ("Risk score", "risk_score"),
+)
 
-if st.session_state.last_error:
-    st.error(f"Run/Refresh error: {st.session_state.last_error}")
 
-if status == "empty" or not metrics:
-    st.warning("No snapshot loaded yet for this instance/company. Click **Run live check now** or **Refresh latest snapshot**.")
-    st.stop()
+# Each tab body is its own fragment: interactions inside one tab (e.g.
+# sorting a dataframe) rerun only that fragment, not every tab.
+@st.fragment
+def tab_email_body(metrics: dict):
+    show_table(pick_list(metrics, "missing_email_sample"), "Missing emails (sample)")
+    st.markdown("---")
+    show_table(pick_list(metrics, "duplicate_email_sample"), "Duplicate emails (sample)")
 
-snapshot_time = metrics.get("snapshot_time_utc") or "unknown"
-st.caption(f"Snapshot UTC: {snapshot_time}")
 
-# KPI Strip — match your gates.py keys
-kpi_cols = st.columns(8)
-kpis = [
-    ("Active users", ("active_users",)),
-    ("EmpJob rows", ("empjob_rows",)),
-    ("Contingent", ("contingent_workers", "contingent_worker_count")),
-    ("Inactive users", ("inactive_users", "inactive_user_count")),
-    ("Missing managers", ("missing_manager_count", "missing_managers")),
-    ("Invalid org", ("invalid_org_count", "invalid_org")),
-    ("Missing emails", ("missing_email_count", "missing_emails")),
-    ("Risk score", ("risk_score",)),
-]
-for col, (label, keys) in zip(kpi_cols, kpis):
-    with col:
-        st.metric(label, metric_int(metrics, *keys))
-
-st.caption(
-    f"Instance: {metrics.get('instance_url', instance_url)}  |  "
-    f"API base: {metrics.get('api_base_url', effective_api_base)}  |  "
-    f"Company: {metrics.get('company_id', company_id) or '—'}"
-)
+@st.fragment
+def tab_org_body(metrics: dict):
+    show_table(pick_list(metrics, "invalid_org_sample"), "Invalid org (sample)")
+    st.markdown("---")
+    st.subheader("Org missing field counts")
+    counts = metrics.get("org_missing_field_counts") or {}
+    if counts:
+        # Column dict goes straight to Arrow — no pandas inference pass.
+        st.dataframe(
+            {"field": list(counts.keys()), "count": list(counts.values())},
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.info("No counts available.")
 
-st.markdown("---")
 
-# Tabs (stable)
-tab_email, tab_org, tab_mgr, tab_work, tab_raw = st.tabs(
-    ["📧 Email hygiene", "🧩 Org checks", "👤 Manager checks", "👥 Workforce", "🔎 Raw JSON"]
-)
+@st.fragment
+def tab_mgr_body(metrics: dict):
+    show_table(pick_list(metrics, "missing_manager_sample"), "Missing managers (sample)")
 
-with tab_email:
-    show_table(
-        pick_list(metrics, "missing_email_sample", "missing_emails_sample"),
-        "Missing emails (sample)",
-    )
-    st.markdown("---")
-    show_table(
-        pick_list(metrics, "duplicate_email_sample", "duplicate_emails_sample"),
-        "Duplicate emails (sample)",
-    )
 
-with tab_org:
-    show_table(
-        pick_list(metrics, "invalid_org_sample"),
-        "Invalid org (sample)",
-    )
+@st.fragment
+def tab_work_body(metrics: dict):
+    show_table(pick_list(metrics, "inactive_users_sample"), "Inactive users (sample)")
     st.markdown("---")
-    st.subheader("Org missing field counts")
-    st.json(metrics.get("org_missing_field_counts", {}))
+    show_table(pick_list(metrics, "contingent_workers_sample"), "Contingent workers (sample)")
+
 
-with tab_mgr:
-    show_table(
-        pick_list(metrics, "missing_manager_sample", "missing_managers_sample"),
-        "Missing managers (sample)",
+@st.fragment
+def tab_raw_body(metrics: dict):
+    payload_json = json.dumps(metrics, default=str)
+    st.download_button(
+        "Download JSON",
+        data=pretty_json(payload_json),
+        file_name="metrics.json",
+        mime="application/json",
     )
+    with st.expander("Show raw JSON", expanded=False):
+        st.code(pretty_json(payload_json), language="json")
+
+
+@st.fragment
+def kpi_strip(metrics: dict):
+    kpi_values = {label: metric_int(metrics, key) for label, key in KPIS}
+    kpi_cols = st.columns(len(KPIS))
+    for col, (label, _) in zip(kpi_cols, KPIS):
+        with col:
+            st.metric(label, kpi_values[label])
+
+
+def render_snapshot():
+    # On auto-refresh ticks only this fragment re-executes; rate-limit the
+    # backend fetch so full-page reruns (e.g. sidebar edits) don't also
+    # trigger one.
+    if auto_refresh and time.monotonic() - st.session_state.get("last_poll_ts", 0.0) >= refresh_seconds:
+        st.session_state.last_poll_ts = time.monotonic()
+        try:
+            apply_latest(fetch_latest(backend_url, instance_url, company_id.strip(), get_etag_store()))
+        except Exception as e:
+            st.session_state.last_error = str(e)
+
+    metrics = st.session_state.last_metrics
+    status = st.session_state.last_status
 
-with tab_work:
-    show_table(
-        pick_list(metrics, "inactive_users_sample"),
-        "Inactive users (sample)",
+    if st.session_state.last_error:
+        st.error(f"Run/Refresh error: {st.session_state.last_error}")
+
+    if status == "empty" or not metrics:
+        st.warning("No snapshot loaded yet for this instance/company. Click **Run live check now** or **Refresh latest snapshot**.")
+        st.stop()
+
+    snapshot_time = metrics.get("snapshot_time_utc") or "unknown"
+    st.caption(f"Snapshot UTC: {snapshot_time}")
+
+    kpi_strip(metrics)
+
+    st.caption(
+        f"Instance: {metrics.get('instance_url', instance_url)}  |  "
+        f"API base: {metrics.get('api_base_url', effective_api_base)}  |  "
+        f"Company: {metrics.get('company_id', company_id) or '—'}"
     )
+
     st.markdown("---")
-    show_table(
-        pick_list(metrics, "contingent_workers_sample"),
-        "Contingent workers (sample)",
-    )
 
-with tab_raw:
-    st.json(metrics)
+    # Tabs (stable)
+    tab_email, tab_org, tab_mgr, tab_work, tab_raw = st.tabs(list(TAB_LABELS))
+
+    with tab_email:
+        tab_email_body(metrics)
+
+    with tab_org:
+        tab_org_body(metrics)
+
+    with tab_mgr:
+        tab_mgr_body(metrics)
+
+    with tab_work:
+        tab_work_body(metrics)
+
+    with tab_raw:
+        tab_raw_body(metrics)
+
+
+# Only the snapshot panel re-executes on auto-refresh ticks; the sidebar
+# and actions row stay untouched between ticks.
+st.fragment(run_every=refresh_seconds if auto_refresh else None)(render_snapshot)()
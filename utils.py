@@ -0,0 +1,203 @@
+"""
+Pure helpers for the HealthFactors Streamlit app.
+
+Kept free of Streamlit so the module is imported (and its functions
+defined) once per process via the import cache, instead of being
+re-created on every script rerun.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+_MISSING = object()
+
+# scheme://host — norm_url guarantees a scheme, so one anchored match
+# extracts the host without urlsplit's full URL tokenization.
+_HOST_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://([^/?#]+)")
+
+
+def json_loads(data: bytes | str):
+    """
+    Decode JSON with orjson when available (C-accelerated, takes bytes
+    directly so requests' text decode is skipped), stdlib json otherwise.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=256)
+def norm_url(u: str) -> str:
+    u = (u or "").strip()
+    if not u:
+        return ""
+    if "://" not in u:
+        u = "https://" + u
+    return u.rstrip("/")
+
+
+@lru_cache(maxsize=256)
+def host_of(u: str) -> str:
+    u = norm_url(u)
+    if not u:
+        return ""
+    m = _HOST_RE.match(u)
+    return m.group(1).strip() if m else ""
+
+
+@lru_cache(maxsize=8)
+def backend_endpoints(backend_url: str) -> tuple[str, str, str]:
+    """
+    Return the (health, latest, run) endpoint URLs for a backend base.
+    Memoized so reruns reuse the built strings, and kept in one place so
+    path changes don't chase f-strings through app.py.
+    """
+    base = norm_url(backend_url)
+    return (f"{base}/health", f"{base}/metrics/latest", f"{base}/run")
+
+
+def backend_url_sane(u: str) -> tuple[bool, str]:
+    """
+    Catch common mistakes like: https://sf-ec-gates-backend. (trailing dot / missing domain)
+    """
+    if not u:
+        return False, "Backend URL is required."
+    h = host_of(u)
+    if not h:
+        return False, "Backend URL is invalid (missing host)."
+    if h.endswith("."):
+        return False, "Backend URL host ends with a dot. Remove the trailing '.'"
+    if "." not in h:
+        return False, "Backend URL host looks incomplete (no dot found)."
+    return True, ""
+
+
+@lru_cache(maxsize=256)
+def derive_api_candidates(instance_url: str) -> tuple[str, ...]:
+    """
+    Provide candidate API bases from instance URL.
+    IMPORTANT: We do NOT auto-select/use these.
+
+    Pure string function, memoized because Streamlit re-runs the script
+    (and therefore this derivation) on every sidebar keystroke.
+    """
+    host = host_of(instance_url)
+    if not host:
+        return ()
+
+    out: list[str] = []
+
+    # hcmXX.sapsf.com -> apiXX.sapsf.com (also supports hcm41preview.sapsf.com -> api41preview.sapsf.com)
+    if host.startswith("hcm") and host.endswith(".sapsf.com"):
+        out.append("https://" + ("api" + host[3:]))
+
+    # Generic: prefix api to host if not already
+    if not host.startswith("api"):
+        out.append("https://" + ("api" + host))
+
+    # If user already pasted api host as "instance", just include it
+    if host.startswith("api"):
+        out.append("https://" + host)
+
+    # De-dupe keeping order. Every candidate is "https://" + a cleaned
+    # host, so no re-normalization pass is needed.
+    return tuple(dict.fromkeys(out))
+
+
+# Alternate key spellings the backend has used, resolved to canonical
+# names once per snapshot so render code reads plain .get lookups.
+KEY_ALIASES = {
+    "contingent_workers": ("contingent_worker_count",),
+    "inactive_users": ("inactive_user_count",),
+    "missing_manager_count": ("missing_managers",),
+    "invalid_org_count": ("invalid_org",),
+    "missing_email_count": ("missing_emails",),
+    "missing_email_sample": ("missing_emails_sample",),
+    "duplicate_email_sample": ("duplicate_emails_sample",),
+    "missing_manager_sample": ("missing_managers_sample",),
+}
+
+
+def canonicalize_metrics(metrics: dict) -> dict:
+    """
+    Fill canonical keys from their alternate spellings, in place. Runs
+    once when a snapshot is applied; every rerun after that reads the
+    canonical key directly instead of scanning aliases.
+    """
+    for canon, alts in KEY_ALIASES.items():
+        if canon not in metrics:
+            for a in alts:
+                if a in metrics:
+                    metrics[canon] = metrics[a]
+                    break
+    return metrics
+
+
+def metric_int(metrics: dict, *keys: str) -> int:
+    """
+    Return first present metric as int.
+    """
+    for k in keys:
+        v = metrics.get(k, _MISSING)
+        if v is _MISSING:
+            continue
+        # Exact-type fast path for the overwhelmingly common case, then
+        # explicit type checks — no exception machinery on this hot path.
+        if type(v) is int:
+            return v
+        if isinstance(v, (int, float)):  # bool / float
+            # NaN/Infinity can reach here: stdlib json parses them.
+            return int(v) if math.isfinite(v) else 0
+        if isinstance(v, str):
+            s = v.strip()
+            sign = -1 if s.startswith("-") else 1
+            digits = s[1:] if sign < 0 else s
+            # isdecimal (not isdigit) so only characters int() accepts
+            # pass, and the validated local is what gets converted.
+            if digits.isdecimal():
+                return sign * int(digits)
+        return 0
+    return 0
+
+
+def tenant_lock_error(
+    backend_url: str,
+    backend_ok: bool,
+    instance_url: str,
+    api_base: str,
+    username: str,
+    password: str,
+) -> str:
+    """
+    Return the first validation error blocking a tenant lock, or "" when
+    all inputs are usable.
+    """
+    if not backend_url:
+        return "Backend URL is required."
+    if not backend_ok:
+        return "Backend must be reachable."
+    if not instance_url:
+        return "Instance URL is required."
+    if not api_base:
+        return "Select API base URL (or override)."
+    if not username or not password:
+        return "Username + Password are required."
+    return ""
+
+
+def pick_list(metrics: dict, *keys: str) -> list[dict]:
+    for k in keys:
+        v = metrics.get(k)
+        # Exact-type check first: backend samples are always plain lists.
+        if type(v) is list or isinstance(v, list):
+            return v
+    return []